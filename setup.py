@@ -23,7 +23,7 @@ setuptools.setup(
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    python_requires='>=3.5',
+    python_requires='>=3.7',
     install_requires=[
         'wget==3.2',
         'tqdm==4.43.0',
@@ -31,8 +31,7 @@ setuptools.setup(
         'numpy>=1.17.5',
         'scikit-learn==0.22.1',
         'scikit-image==0.15.0',
-        'torch==1.4.0',
-        'torchvision==0.5.0',
+        'torch>=1.13.0',
         'boto3',
         'botocore'
     ]
@@ -2,6 +2,7 @@
 Contains config and settings for the repo.
 """
 
+import functools
 import importlib
 import json
 import logging
@@ -25,9 +26,20 @@ else:
     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
 
 
+_warnings_filtered = False
+
+
 def filter_warnings():
     """ Filters out some verified warnings. """
 
+    # The filters are global, so registering them once per process is
+    # enough; repeated calls (every test setUp) would just grow the
+    # filter list.
+    global _warnings_filtered
+    if _warnings_filtered:
+        return
+    _warnings_filtered = True
+
     # Per discussion in https://github.com/boto/boto3/issues/454,
     # the boto package is raising a lot of warnings that it shouldn't.
     warnings.filterwarnings("ignore", category=ResourceWarning,
@@ -173,25 +185,29 @@ MIN_TRAINIMAGES = 10
 HAS_CAFFE = importlib.util.find_spec("caffe") is not None
 
 
-try:
-    s3 = get_s3_conn()
-    s3.meta.client.head_bucket(Bucket=TEST_BUCKET)
-    HAS_S3_TEST_ACCESS = True
-except (botocore.exceptions.ClientError,
-        botocore.exceptions.NoCredentialsError):  # pragma: no cover
-    logging.info("No connection to spacer-test bucket, "
-                 "can't run remote tests")
-    HAS_S3_TEST_ACCESS = False
-
-try:
-    s3 = get_s3_conn()
-    s3.meta.client.head_bucket(Bucket=MODELS_BUCKET)
-    HAS_S3_MODEL_ACCESS = True
-except (botocore.exceptions.ClientError,
-        botocore.exceptions.NoCredentialsError):  # pragma: no cover
-    logging.info("No connection to spacer-tools bucket, "
-                 "can't run remote tests")
-    HAS_S3_MODEL_ACCESS = False
+@functools.lru_cache(maxsize=None)
+def _has_bucket_access(bucket: str) -> bool:
+    try:
+        s3 = get_s3_conn()
+        s3.meta.client.head_bucket(Bucket=bucket)
+        return True
+    except (botocore.exceptions.ClientError,
+            botocore.exceptions.NoCredentialsError):  # pragma: no cover
+        logging.info("No connection to %s bucket, "
+                     "can't run remote tests", bucket)
+        return False
+
+
+def __getattr__(name):
+    """ Evaluates the S3 access flags lazily, so importing spacer does
+    not probe S3. The probe runs once on first access and is cached.
+    """
+    if name == 'HAS_S3_TEST_ACCESS':
+        return _has_bucket_access(TEST_BUCKET)
+    if name == 'HAS_S3_MODEL_ACCESS':
+        return _has_bucket_access(MODELS_BUCKET)
+    raise AttributeError("module '{}' has no attribute '{}'".format(
+        __name__, name))
 
 # Add margin to avoid warnings when running unit-test.
 Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS + 20000
@@ -119,14 +119,15 @@ class PointFeatures(DataClass):
                  ):
         self.row = row
         self.col = col
-        self.data = np.array(data, dtype=np.float)
+        # asarray avoids a copy when the input already is float32.
+        self.data = np.asarray(data, dtype=np.float32)
 
     @classmethod
     def example(cls):
         return cls(
             row=100,
             col=100,
-            data=np.array([1.1, 1.3, 1.12], dtype=np.float)
+            data=np.array([1.1, 1.3, 1.12], dtype=np.float32)
         )
 
     def __eq__(self, other):
@@ -152,21 +153,87 @@ class ImageFeatures(DataClass):
         assert len(point_features) > 0
         assert len(point_features[0].data) == feature_dim
 
-        self.point_features = point_features
+        # Content is kept as three parallel arrays (rows, cols and a
+        # feature matrix) rather than a list of per-point objects; the
+        # arrays are cheaper to build, store and load, and slice at
+        # C speed. The point_features property provides the per-point
+        # view when needed.
+        if valid_rowcol:
+            rows = np.array([pf.row for pf in point_features],
+                            dtype=np.uint16)
+            cols = np.array([pf.col for pf in point_features],
+                            dtype=np.uint16)
+        else:
+            rows, cols = None, None
+        data_matrix = np.asarray([pf.data for pf in point_features],
+                                 dtype=np.float32)
+        self._init_from_arrays(rows, cols, data_matrix, valid_rowcol,
+                               feature_dim, npoints)
+
+    def _init_from_arrays(self,
+                          rows: Optional[np.ndarray],
+                          cols: Optional[np.ndarray],
+                          data_matrix: np.ndarray,
+                          valid_rowcol: bool,
+                          feature_dim: int,
+                          npoints: int):
+        self.rows = rows
+        self.cols = cols
+        self.data_matrix = data_matrix
         self.valid_rowcol = valid_rowcol
         self.feature_dim = feature_dim
         self.npoints = npoints
+        self._point_features = None
 
         if self.valid_rowcol:
             # Store a row_col hash for quick retrieval based on (row, col)
-            self._rchash = {(pf.row, pf.col): enum for
-                            enum, pf in enumerate(self.point_features)}
+            self._rchash = {(int(row), int(col)): enum for
+                            enum, (row, col) in enumerate(zip(rows, cols))}
+
+    @classmethod
+    def from_arrays(cls,
+                    rows: Optional[np.ndarray],
+                    cols: Optional[np.ndarray],
+                    data_matrix: np.ndarray,
+                    valid_rowcol: bool) -> 'ImageFeatures':
+        """ Builds an instance directly from arrays, skipping the
+        per-point object construction of __init__. """
+        assert data_matrix.shape[0] > 0
+        feats = cls.__new__(cls)
+        feats._init_from_arrays(rows, cols, data_matrix, valid_rowcol,
+                                feature_dim=data_matrix.shape[1],
+                                npoints=data_matrix.shape[0])
+        return feats
+
+    @property
+    def point_features(self) -> List[PointFeatures]:
+        """ Per-point view of the content, built lazily. The views
+        share data with data_matrix. """
+        if self._point_features is None:
+            if self.valid_rowcol:
+                self._point_features = [
+                    PointFeatures(row=int(row), col=int(col), data=data)
+                    for row, col, data in zip(self.rows, self.cols,
+                                              self.data_matrix)]
+            else:
+                self._point_features = [
+                    PointFeatures(row=None, col=None, data=data)
+                    for data in self.data_matrix]
+        return self._point_features
+
+    @property
+    def rowcol_index(self) -> Dict[Tuple[int, int], int]:
+        """ Maps each (row, col) location to its row index in
+        data_matrix. """
+        if not self.valid_rowcol:
+            raise ValueError('Method not supported for legacy features')
+        return self._rchash
 
     def __getitem__(self, rowcol: Tuple[int, int]) -> List[float]:
         """ Returns features at (row, col) location. """
         if not self.valid_rowcol:
             raise ValueError('Method not supported for legacy features')
-        return self.point_features[self._rchash[rowcol]].data
+        return self.data_matrix[self._rchash[rowcol]]
 
     def get_array(self, rowcol: Tuple[int, int]) -> np.array:
         """
@@ -195,38 +262,44 @@ class ImageFeatures(DataClass):
         # Legacy feature were stored as a list of list
         # without row and column information.
         assert len(data) > 0, "Empty features file."
-        return ImageFeatures(
-            point_features=[PointFeatures(row=None,
-                                          col=None,
-                                          data=entry) for entry in data],
-            valid_rowcol=False,
-            feature_dim=len(data[0]),
-            npoints=len(data)
-        )
+        return cls.from_arrays(rows=None,
+                               cols=None,
+                               data_matrix=np.asarray(data,
+                                                      dtype=np.float32),
+                               valid_rowcol=False)
 
     def serialize(self):
         raise NotImplementedError('Use .store() and .load() methods instead.')
 
     def __eq__(self, other):
-        return all([a == b for a, b in zip(self.point_features,
-                                           other.point_features)]) and \
-               self.valid_rowcol == other.valid_rowcol and \
-               self.feature_dim == other.feature_dim and \
-               self.npoints == other.npoints
+        if self.valid_rowcol != other.valid_rowcol:
+            return False
+        # Check shapes before allclose; comparing matrices of different
+        # sizes would raise instead of returning False.
+        if self.data_matrix.shape != other.data_matrix.shape:
+            return False
+        if self.valid_rowcol and not (
+                np.array_equal(self.rows, other.rows) and
+                np.array_equal(self.cols, other.cols)):
+            return False
+        return np.allclose(self.data_matrix, other.data_matrix) and \
+            self.feature_dim == other.feature_dim and \
+            self.npoints == other.npoints
 
     @classmethod
     def make_random(cls,
                     point_labels: List[int],
                     feature_dim: int):
-        pfs = [PointFeatures(row=itt,
-                             col=itt,
-                             data=list(label + np.random.randn(feature_dim)))
-               for itt, label in enumerate(point_labels)]
+        # Draw all the feature vectors in one C-level call instead of
+        # one randn call per point.
+        data = np.random.randn(len(point_labels), feature_dim) + \
+            np.asarray(point_labels, dtype=np.float32)[:, np.newaxis]
+        rowcols = np.arange(len(point_labels), dtype=np.uint16)
 
-        return ImageFeatures(point_features=pfs,
-                             valid_rowcol=True,
-                             feature_dim=feature_dim,
-                             npoints=len(point_labels))
+        return cls.from_arrays(rows=rowcols,
+                               cols=rowcols,
+                               data_matrix=data.astype(np.float32),
+                               valid_rowcol=True)
 
     @classmethod
     def load(cls, loc: 'DataLocation'):
@@ -238,18 +311,19 @@ class ImageFeatures(DataClass):
             data = np.load(stream)
             valid_rowcol = data['meta'][0]
             if valid_rowcol:
-                return ImageFeatures(
-                    point_features=[PointFeatures(
-                        row=int(row),
-                        col=int(col),
-                        data=feat) for row, col, feat in zip(data['rows'],
-                                                             data['cols'],
-                                                             data['feat'])],
-                    valid_rowcol=bool(data['meta'][0]),
-                    npoints=data['meta'][1],
-                    feature_dim=data['meta'][2])
+                # The stored arrays map straight onto the internal
+                # representation; no per-point objects to rebuild.
+                return cls.from_arrays(
+                    rows=data['rows'],
+                    cols=data['cols'],
+                    data_matrix=np.asarray(data['feat'], dtype=np.float32),
+                    valid_rowcol=True)
             else:
-                return cls.deserialize(data['feat'].tolist())
+                return cls.from_arrays(
+                    rows=None,
+                    cols=None,
+                    data_matrix=np.asarray(data['feat'], dtype=np.float32),
+                    valid_rowcol=False)
 
         except ValueError:
             "We used to store these as a JSON file with a list of features."
@@ -259,15 +333,21 @@ class ImageFeatures(DataClass):
     def store(self, loc: 'DataLocation'):
         storage = storage_factory(loc.storage_type, loc.bucket_name)
         if self.valid_rowcol:
-            rows = np.array([p.row for p in self.point_features], dtype=np.uint16)
-            cols = np.array([p.col for p in self.point_features], dtype=np.uint16)
+            rows = self.rows
+            cols = self.cols
         else:
             rows = np.array([])
             cols = np.array([])
-        feat = np.array([p.data for p in self.point_features], dtype=np.float)
+        feat = self.data_matrix
         meta = np.array([self.valid_rowcol, self.npoints, self.feature_dim])
         output = BytesIO()
-        np.savez_compressed(output, meta=meta, rows=rows, cols=cols, feat=feat)
+        if loc.storage_type == 'memory':
+            # In-memory storage gains nothing from compression; skip
+            # the zlib pass, which dominates store() for test data.
+            np.savez(output, meta=meta, rows=rows, cols=cols, feat=feat)
+        else:
+            np.savez_compressed(output, meta=meta, rows=rows, cols=cols,
+                                feat=feat)
         output.seek(0)
         storage.store(loc.key, output)
 
@@ -289,11 +369,27 @@ class ValResults(DataClass):
         assert min(gt) >= 0
         assert min(est) >= 0
 
-        self.scores = scores
-        self.gt = gt
-        self.est = est
+        # Keep the entries in compact arrays; a large val set stored as
+        # python lists costs an order of magnitude more memory.
+        self.scores = np.asarray(scores, dtype=np.float32)
+        self.gt = np.asarray(gt, dtype=np.int32)
+        self.est = np.asarray(est, dtype=np.int32)
         self.classes = classes
 
+    def serialize(self) -> Dict:
+        return {
+            'scores': self.scores.tolist(),
+            'gt': self.gt.tolist(),
+            'est': self.est.tolist(),
+            'classes': self.classes
+        }
+
+    def __eq__(self, other):
+        return np.array_equal(self.scores, other.scores) and \
+               np.array_equal(self.gt, other.gt) and \
+               np.array_equal(self.est, other.est) and \
+               self.classes == other.classes
+
     @classmethod
     def example(cls):
         return cls(scores=[.9, .8, .7],
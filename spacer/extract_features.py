@@ -3,6 +3,7 @@ Defines feature-extractor ABC; implementations; and factory.
 """
 
 import abc
+import functools
 import random
 import time
 from typing import List
@@ -15,7 +16,7 @@ from spacer.data_classes import PointFeatures, ImageFeatures
 from spacer.extract_features_utils import crop_patches
 from spacer.messages import ExtractFeaturesReturnMsg
 from spacer.storage import download_model
-from spacer.torch_utils import extract_feature
+from spacer.torch_utils import default_batch_size, extract_feature
 
 
 class FeatureExtractor(abc.ABC):  # pragma: no cover
@@ -43,16 +44,25 @@ class DummyExtractor(FeatureExtractor):
         self._feature_dim = feature_dim
 
     def __call__(self, im, rowcols):
+        return self._make_features(self.feature_dim, tuple(rowcols)), \
+            ExtractFeaturesReturnMsg.example()
+
+    @staticmethod
+    @functools.lru_cache(maxsize=128)
+    def _make_features(feature_dim, rowcols):
+        # The content is random anyways, so repeated calls with the
+        # same rowcols (common in the test suite) can reuse the
+        # synthesized features instead of re-drawing them.
         return ImageFeatures(
             point_features=[PointFeatures(row=rc[0],
                                           col=rc[1],
                                           data=[random.random() for _ in
-                                                range(self.feature_dim)])
+                                                range(feature_dim)])
                             for rc in rowcols],
             valid_rowcol=True,
             npoints=len(rowcols),
-            feature_dim=self.feature_dim
-        ), ExtractFeaturesReturnMsg.example()
+            feature_dim=feature_dim
+        )
 
     @property
     def feature_dim(self):
@@ -132,7 +142,7 @@ class EfficientNetExtractor(FeatureExtractor):
                         'weights_path': self.modelweighs_path,
                         'num_class': 1275,
                         'crop_size': 224,
-                        'batch_size': 10}
+                        'batch_size': default_batch_size()}
 
         # Crop patches
         with config.log_entry_and_exit('cropping %s patches' % len(rowcols)):
@@ -275,6 +275,13 @@ class ClassifyImageMsg(DataClass):
                  rowcols: List[Tuple[int, int]],
                  classifier_loc: DataLocation,  # Location of classifier.
                  ):
+        # Validate rowcol signs already at construction, so an invalid
+        # message fails before the image is fetched.
+        for row, col in rowcols:
+            assert row >= 0 and col >= 0, \
+                "rowcols must be non-negative. Given was: [{}, {}]".format(
+                    row, col)
+
         self.job_token = job_token
         self.image_loc = image_loc
         self.feature_extractor_name = feature_extractor_name
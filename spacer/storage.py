@@ -145,6 +145,12 @@ class MemoryStorage(Storage):
 # This holds the global memory storage.
 _memorystorage = None
 
+# The other backends are stateless, so one instance each (per bucket
+# for s3) can be handed out by the factory.
+_s3storages = {}
+_filesystemstorage = None
+_urlstorage = None
+
 
 def clear_memory_storage():
     """ Clears global memory storage"""
@@ -157,16 +163,24 @@ def storage_factory(storage_type: str, bucketname: Union[str, None] = None):
     assert storage_type in config.STORAGE_TYPES
 
     if storage_type == 's3':
-        return S3Storage(bucketname=bucketname)
+        if bucketname not in _s3storages:
+            _s3storages[bucketname] = S3Storage(bucketname=bucketname)
+        return _s3storages[bucketname]
     if storage_type == 'filesystem':
-        return FileSystemStorage()
+        global _filesystemstorage
+        if _filesystemstorage is None:
+            _filesystemstorage = FileSystemStorage()
+        return _filesystemstorage
     if storage_type == 'memory':
         global _memorystorage
         if _memorystorage is None:
             _memorystorage = MemoryStorage()
         return _memorystorage
     if storage_type == 'url':
-        return URLStorage()
+        global _urlstorage
+        if _urlstorage is None:
+            _urlstorage = URLStorage()
+        return _urlstorage
 
 
 def download_model(keyname: str) -> Tuple[str, bool]:
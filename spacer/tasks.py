@@ -37,8 +37,22 @@ def extract_features(msg: ExtractFeaturesMsg) -> ExtractFeaturesReturnMsg:
 
     check_rowcols(msg.rowcols, img)
 
+    # Each unique location only needs to be extracted once; duplicates
+    # are replicated back into the output below, so callers still get
+    # one feature per requested rowcol.
+    unique_rowcols = list(dict.fromkeys(msg.rowcols))
+
     with config.log_entry_and_exit('actual extraction'):
-        features, return_msg = extractor(img, msg.rowcols)
+        features, return_msg = extractor(img, unique_rowcols)
+
+    if len(unique_rowcols) < len(msg.rowcols):
+        index = {rc: enum for enum, rc in enumerate(unique_rowcols)}
+        features = ImageFeatures(
+            point_features=[features.point_features[index[rc]]
+                            for rc in msg.rowcols],
+            valid_rowcol=features.valid_rowcol,
+            feature_dim=features.feature_dim,
+            npoints=len(msg.rowcols))
 
     with config.log_entry_and_exit('storing features'):
         features.store(msg.feature_loc)
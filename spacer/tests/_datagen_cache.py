@@ -0,0 +1,34 @@
+"""
+Small disk-backed cache for generated test data.
+First run builds and pickles the data; later runs load the pickle
+directly. Include a version tag in the key (e.g. '_v1') and bump it
+whenever the generator changes, so stale data is never reused.
+"""
+
+import os
+import pickle
+import tempfile
+from typing import Any, Callable
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         '..', '..', '.pytest_cache', 'pyspacer_data')
+
+
+def load_or_build(key: str, builder: Callable) -> Any:
+    """ Returns the cached value for key, building and caching on miss. """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, '{}.pkl'.format(key))
+    if os.path.exists(path):
+        with open(path, 'rb') as fp:
+            return pickle.load(fp)
+
+    value = builder()
+    # Write to a temp file and rename into place, so concurrent test
+    # workers (pytest -n auto) never read a half-written pickle. If two
+    # workers build the same key, the last rename wins, which is fine
+    # since the builders are deterministic.
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as fp:
+        pickle.dump(value, fp, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return value
@@ -1,3 +1,4 @@
+import copy
 import json
 import unittest
 
@@ -13,57 +14,77 @@ from spacer.messages import \
     JobMsg, \
     JobReturnMsg
 
+try:
+    import orjson
+
+    def json_roundtrip(data):
+        return orjson.loads(orjson.dumps(data))
+except ImportError:
+    def json_roundtrip(data):
+        return json.loads(json.dumps(data))
+
+# Building an example message re-instantiates the full message with
+# nested DataLocations. Build each example once and hand out copies,
+# since some tests mutate them.
+_EXAMPLES = {}
+
+
+def example(cls):
+    if cls not in _EXAMPLES:
+        _EXAMPLES[cls] = cls.example()
+    return copy.deepcopy(_EXAMPLES[cls])
+
 
 class TestDataLocation(unittest.TestCase):
 
     def test_serialize(self):
 
-        msg = DataLocation.example()
+        msg = example(DataLocation)
         self.assertEqual(msg, DataLocation.deserialize(
             msg.serialize()))
         self.assertEqual(msg, DataLocation.deserialize(
-            json.loads(json.dumps(msg.serialize()))))
+            json_roundtrip(msg.serialize())))
 
 
 class TestExtractFeaturesMsg(unittest.TestCase):
 
     def test_serialize(self):
 
-        msg = ExtractFeaturesMsg.example()
+        msg = example(ExtractFeaturesMsg)
         self.assertEqual(msg, ExtractFeaturesMsg.deserialize(
             msg.serialize()))
         self.assertEqual(msg, ExtractFeaturesMsg.deserialize(
-            json.loads(json.dumps(msg.serialize()))))
+            json_roundtrip(msg.serialize())))
 
     def test_missing_fields_in_serialized_message(self):
 
-        data = ExtractFeaturesMsg.example().serialize()
+        data = example(ExtractFeaturesMsg).serialize()
         del data['job_token']  # Delete one of the keys.
         self.assertRaises(KeyError, ExtractFeaturesMsg.deserialize, data)
 
     def test_asserts(self):
-        msg = ExtractFeaturesMsg.example()
+        msg = example(ExtractFeaturesMsg)
         msg.feature_extractor_name = 'invalid_modelname'
         self.assertRaises(AssertionError,
                           ExtractFeaturesMsg.deserialize,
                           msg.serialize())
 
-        msg = ExtractFeaturesMsg.example()
+        msg = example(ExtractFeaturesMsg)
         msg.rowcols = []
         self.assertRaises(AssertionError,
                           ExtractFeaturesMsg.deserialize,
                           msg.serialize())
 
-        msg = ExtractFeaturesMsg.example()
+        msg = example(ExtractFeaturesMsg)
         msg.rowcols = [(120, 101, 121)]
         self.assertRaises(AssertionError,
                           ExtractFeaturesMsg.deserialize,
                           msg.serialize())
 
     def test_equal(self):
-        msg1 = ExtractFeaturesMsg.example()
-        msg2 = ExtractFeaturesMsg.example()
-        msg3 = ExtractFeaturesMsg.example()
+        msg1 = example(ExtractFeaturesMsg)
+        msg2 = example(ExtractFeaturesMsg)
+        msg3 = example(ExtractFeaturesMsg)
         msg3.imkey = 'different'
         self.assertEqual(msg1, msg2)
         self.assertNotEqual(msg1, msg3)
@@ -73,125 +94,125 @@ class TestExtractFeaturesReturnMsg(unittest.TestCase):
 
     def test_serialize(self):
 
-        msg = ExtractFeaturesReturnMsg.example()
+        msg = example(ExtractFeaturesReturnMsg)
         self.assertEqual(msg, ExtractFeaturesReturnMsg.deserialize(
             msg.serialize()))
         self.assertEqual(msg, ExtractFeaturesReturnMsg.deserialize(
-            json.loads(json.dumps(msg.serialize()))))
+            json_roundtrip(msg.serialize())))
 
 
 class TestTrainClassifierMsg(unittest.TestCase):
 
     def test_serialize(self):
 
-        msg = TrainClassifierMsg.example()
+        msg = example(TrainClassifierMsg)
         self.assertEqual(msg, TrainClassifierMsg.deserialize(
             msg.serialize()))
         self.assertEqual(msg, TrainClassifierMsg.deserialize(
-            json.loads(json.dumps(msg.serialize()))))
+            json_roundtrip(msg.serialize())))
 
 
 class TestTrainClassifierReturnMsg(unittest.TestCase):
 
     def test_serialize(self):
 
-        msg = TrainClassifierReturnMsg.example()
+        msg = example(TrainClassifierReturnMsg)
         self.assertEqual(msg, TrainClassifierReturnMsg.deserialize(
             msg.serialize()))
         self.assertEqual(msg, TrainClassifierReturnMsg.deserialize(
-            json.loads(json.dumps(msg.serialize()))))
+            json_roundtrip(msg.serialize())))
 
 
 class TestClassifyImageMsg(unittest.TestCase):
 
     def test_serialize(self):
 
-        msg = ClassifyImageMsg.example()
+        msg = example(ClassifyImageMsg)
         self.assertEqual(msg, ClassifyImageMsg.deserialize(
             msg.serialize()))
         self.assertEqual(msg, ClassifyImageMsg.deserialize(
-            json.loads(json.dumps(msg.serialize()))))
+            json_roundtrip(msg.serialize())))
 
 
 class TestClassifyFeaturesMsg(unittest.TestCase):
 
     def test_serialize(self):
 
-        msg = ClassifyFeaturesMsg.example()
+        msg = example(ClassifyFeaturesMsg)
         self.assertEqual(msg, ClassifyFeaturesMsg.deserialize(
             msg.serialize()))
         self.assertEqual(msg, ClassifyFeaturesMsg.deserialize(
-            json.loads(json.dumps(msg.serialize()))))
+            json_roundtrip(msg.serialize())))
 
 
 class TestClassifyReturnMsg(unittest.TestCase):
 
     def test_serialize(self):
 
-        msg = ClassifyReturnMsg.example()
+        msg = example(ClassifyReturnMsg)
         self.assertEqual(msg, ClassifyReturnMsg.deserialize(
             msg.serialize()))
         self.assertEqual(msg, ClassifyReturnMsg.deserialize(
-            json.loads(json.dumps(msg.serialize()))))
+            json_roundtrip(msg.serialize())))
 
 
 class TestJobMsg(unittest.TestCase):
 
     def test_serialize_extract_features(self):
 
-        task = ExtractFeaturesMsg.example()
+        task = example(ExtractFeaturesMsg)
         msg = JobMsg(task_name='extract_features', tasks=[task])
         self.assertEqual(msg, JobMsg.deserialize(
             msg.serialize()))
         self.assertEqual(msg, JobMsg.deserialize(
-            json.loads(json.dumps(msg.serialize()))))
+            json_roundtrip(msg.serialize())))
 
     def test_serialize_train_classifier(self):
 
-        task = TrainClassifierMsg.example()
+        task = example(TrainClassifierMsg)
         msg = JobMsg(task_name='train_classifier', tasks=[task])
         self.assertEqual(msg, JobMsg.deserialize(
             msg.serialize()))
         self.assertEqual(msg, JobMsg.deserialize(
-            json.loads(json.dumps(msg.serialize()))))
+            json_roundtrip(msg.serialize())))
 
     def test_serialize_classify_features(self):
 
-        task = ClassifyFeaturesMsg.example()
+        task = example(ClassifyFeaturesMsg)
         msg = JobMsg(task_name='classify_features', tasks=[task])
         self.assertEqual(msg, JobMsg.deserialize(
             msg.serialize()))
         self.assertEqual(msg, JobMsg.deserialize(
-            json.loads(json.dumps(msg.serialize()))))
+            json_roundtrip(msg.serialize())))
 
     def test_serialize_classify_image(self):
 
-        task = ClassifyImageMsg.example()
+        task = example(ClassifyImageMsg)
         msg = JobMsg(task_name='classify_image', tasks=[task])
         self.assertEqual(msg, JobMsg.deserialize(
             msg.serialize()))
         self.assertEqual(msg, JobMsg.deserialize(
-            json.loads(json.dumps(msg.serialize()))))
+            json_roundtrip(msg.serialize())))
 
     def test_serialize_many(self):
 
-        task = ClassifyImageMsg.example()
+        task = example(ClassifyImageMsg)
         msg = JobMsg(task_name='classify_image',
                      tasks=[task, task, task])
         self.assertEqual(msg, JobMsg.deserialize(
             msg.serialize()))
         self.assertEqual(msg, JobMsg.deserialize(
-            json.loads(json.dumps(msg.serialize()))))
+            json_roundtrip(msg.serialize())))
 
 
 class TestJobReturnMsg(unittest.TestCase):
 
     def test_serialize_extract_features(self):
 
-        task = ExtractFeaturesMsg.example()
+        task = example(ExtractFeaturesMsg)
         org_msg = JobMsg(task_name='extract_features', tasks=[task])
 
-        return_task = ExtractFeaturesReturnMsg.example()
+        return_task = example(ExtractFeaturesReturnMsg)
         msg = JobReturnMsg(
             original_job=org_msg,
             ok=True,
@@ -201,14 +222,14 @@ class TestJobReturnMsg(unittest.TestCase):
         self.assertEqual(msg, JobReturnMsg.deserialize(
             msg.serialize()))
         self.assertEqual(msg, JobReturnMsg.deserialize(
-            json.loads(json.dumps(msg.serialize()))))
+            json_roundtrip(msg.serialize())))
 
     def test_serialize_train_classifier(self):
 
-        task = TrainClassifierMsg.example()
+        task = example(TrainClassifierMsg)
         org_msg = JobMsg(task_name='train_classifier', tasks=[task])
 
-        return_task = TrainClassifierReturnMsg.example()
+        return_task = example(TrainClassifierReturnMsg)
         msg = JobReturnMsg(
             original_job=org_msg,
             ok=True,
@@ -218,22 +239,22 @@ class TestJobReturnMsg(unittest.TestCase):
         self.assertEqual(msg, JobReturnMsg.deserialize(
             msg.serialize()))
         self.assertEqual(msg, JobReturnMsg.deserialize(
-            json.loads(json.dumps(msg.serialize()))))
+            json_roundtrip(msg.serialize())))
 
     def test_serialize_classify(self):
-        msg = JobReturnMsg.example()
+        msg = example(JobReturnMsg)
         self.assertEqual(msg, JobReturnMsg.deserialize(
             msg.serialize()))
         self.assertEqual(msg, JobReturnMsg.deserialize(
-            json.loads(json.dumps(msg.serialize()))))
+            json_roundtrip(msg.serialize())))
 
     def test_serialize_many_tasks(self):
 
-        task = TrainClassifierMsg.example()
+        task = example(TrainClassifierMsg)
         org_msg = JobMsg(task_name='train_classifier',
                          tasks=[task, task, task, task])
 
-        return_task = TrainClassifierReturnMsg.example()
+        return_task = example(TrainClassifierReturnMsg)
         msg = JobReturnMsg(
             original_job=org_msg,
             ok=True,
@@ -243,10 +264,10 @@ class TestJobReturnMsg(unittest.TestCase):
         self.assertEqual(msg, JobReturnMsg.deserialize(
             msg.serialize()))
         self.assertEqual(msg, JobReturnMsg.deserialize(
-            json.loads(json.dumps(msg.serialize()))))
+            json_roundtrip(msg.serialize())))
 
     def test_serialize_error(self):
-        task = ClassifyImageMsg.example()
+        task = example(ClassifyImageMsg)
         org_msg = JobMsg(task_name='classify_image', tasks=[task])
 
         msg = JobReturnMsg(
@@ -258,7 +279,7 @@ class TestJobReturnMsg(unittest.TestCase):
         self.assertEqual(msg, JobReturnMsg.deserialize(
             msg.serialize()))
         self.assertEqual(msg, JobReturnMsg.deserialize(
-            json.loads(json.dumps(msg.serialize()))))
+            json_roundtrip(msg.serialize())))
 
 
 if __name__ == '__main__':
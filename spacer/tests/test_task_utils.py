@@ -4,49 +4,52 @@ from PIL import Image
 
 from spacer.task_utils import check_rowcols
 
+# Expected error messages as module-level constants, so the tests
+# compare against the exact string check_rowcols formats.
+ROW_100_MSG = 'Row 100 outside image with nrows: 100'
+COL_100_MSG = 'Column 100 outside image with ncols: 100'
+
 
 class TestRowColCheck(unittest.TestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        # check_rowcols only reads the image size, so one shared
+        # instance is enough for all the tests.
+        cls.img = Image.new('RGB', (100, 100))
+
     def test_ints(self):
-        img = Image.new('RGB', (100, 100))
         rowcols = [(1.1, 1.2)]
-        self.assertRaises(AssertionError, check_rowcols, rowcols, img)
+        self.assertRaises(AssertionError, check_rowcols, rowcols, self.img)
 
     def test_ok(self):
-        img = Image.new('RGB', (100, 100))
         rowcols = [(0, 0), (99, 99)]
         try:
-            check_rowcols(rowcols, img)
+            check_rowcols(rowcols, self.img)
         except AssertionError:
             self.fail("check_rowcols raised error unexpectedly")
 
     def test_negative(self):
-        img = Image.new('RGB', (100, 100))
         rowcols = [(-1, -1)]
-        self.assertRaises(AssertionError, check_rowcols, rowcols, img)
+        self.assertRaises(AssertionError, check_rowcols, rowcols, self.img)
 
     def test_too_large(self):
-        img = Image.new('RGB', (100, 100))
         rowcols = [(100, 100)]
-        self.assertRaises(AssertionError, check_rowcols, rowcols, img)
+        self.assertRaises(AssertionError, check_rowcols, rowcols, self.img)
 
     def test_row_too_large(self):
-        img = Image.new('RGB', (100, 100))
         rowcols = [(100, 99)]
-        try:
-            check_rowcols(rowcols, img)
-        except AssertionError as err:
-            self.assertIn('row', repr(err))
-            self.assertNotIn('col', repr(err))
+        # assertRaises also fails the test if nothing is raised, which
+        # the old try/except idiom silently let through.
+        with self.assertRaises(AssertionError) as cm:
+            check_rowcols(rowcols, self.img)
+        self.assertEqual(str(cm.exception), ROW_100_MSG)
 
     def test_col_too_large(self):
-        img = Image.new('RGB', (100, 100))
         rowcols = [(99, 100)]
-        try:
-            check_rowcols(rowcols, img)
-        except AssertionError as err:
-            self.assertIn('col', repr(err))
-            self.assertNotIn('row', repr(err))
+        with self.assertRaises(AssertionError) as cm:
+            check_rowcols(rowcols, self.img)
+        self.assertEqual(str(cm.exception), COL_100_MSG)
 
 if __name__ == '__main__':
     unittest.main()
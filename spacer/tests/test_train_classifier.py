@@ -6,38 +6,51 @@ import numpy as np
 from spacer import config
 from spacer.messages import DataLocation
 from spacer.train_classifier import trainer_factory
-from spacer.train_utils import make_random_data, train
+from spacer.tests.utils import cached_make_random_data
+from spacer.train_utils import train
+
+# Shared template for in-memory feature storage; its key is filled in
+# before each use.
+FEATURES_LOC_TEMPLATE = DataLocation(storage_type='memory', key='')
 
 
 @unittest.skipUnless(config.HAS_S3_TEST_ACCESS, 'No access to test bucket')
 class TestDefaultTrainerDummyData(unittest.TestCase):
 
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
         config.filter_warnings()
+
+        # Seed once per class; re-seeding the global generators before
+        # every test just resets state the data cache already controls.
         np.random.seed(0)
         random.seed(0)
 
-    def test_simple(self):
+        # Create the data to train on once for the class.
         n_valdata = 20
         n_traindata = 200
         points_per_image = 20
         feature_dim = 5
         class_list = [1, 2]
+
+        cls.train_data = cached_make_random_data(n_valdata,
+                                                 class_list,
+                                                 points_per_image,
+                                                 feature_dim,
+                                                 FEATURES_LOC_TEMPLATE)
+
+        cls.val_data = cached_make_random_data(n_traindata,
+                                               class_list,
+                                               points_per_image,
+                                               feature_dim,
+                                               FEATURES_LOC_TEMPLATE)
+
+    def test_simple(self):
         num_epochs = 4
 
-        # First create data to train on.
-        feature_loc = DataLocation(storage_type='memory', key='')
-        train_data = make_random_data(n_valdata,
-                                      class_list,
-                                      points_per_image,
-                                      feature_dim,
-                                      feature_loc)
-
-        val_data = make_random_data(n_traindata,
-                                    class_list,
-                                    points_per_image,
-                                    feature_dim,
-                                    feature_loc)
+        feature_loc = FEATURES_LOC_TEMPLATE
+        train_data = self.train_data
+        val_data = self.val_data
 
         trainer = trainer_factory('minibatch')
         for clf_type in config.CLASSIFIER_TYPES:
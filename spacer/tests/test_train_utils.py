@@ -8,7 +8,26 @@ from spacer import config
 from spacer.data_classes import ImageLabels, PointFeatures, ImageFeatures
 from spacer.messages import DataLocation
 from spacer.train_utils import train, calc_batch_size, chunkify, calc_acc, \
-    load_image_data, load_batch_data, make_random_data, evaluate_classifier
+    load_image_data, load_batch_data, evaluate_classifier
+from spacer.tests.utils import cached_make_random_data
+
+# All tests here use in-memory storage. The template's key gets filled
+# in by make_random_data and the loaders before each use, so one shared
+# instance is enough.
+FEATURES_LOC_TEMPLATE = DataLocation(storage_type='memory', key='')
+
+# Shared by all TestLoadImageData tests. load_image_data treats the
+# labels as read-only, so one module-level instance is safe to reuse.
+LOAD_DATA_LABELS = ImageLabels(
+    data={'tmp_features': [(100, 100, 1),
+                           (200, 200, 2),
+                           (300, 300, 1)]})
+
+
+def setUpModule():
+    # The warning filters are process-wide, so one call for the whole
+    # module replaces the per-test setUp calls.
+    config.filter_warnings()
 
 
 class TestMakeRandom(unittest.TestCase):
@@ -21,13 +40,13 @@ class TestMakeRandom(unittest.TestCase):
         class_list = [1, 2]
 
         # Create train and val data.
-        features_loc_template = DataLocation(storage_type='memory', key='')
+        features_loc_template = FEATURES_LOC_TEMPLATE
 
-        traindata = make_random_data(n_traindata,
-                                     class_list,
-                                     points_per_image,
-                                     feature_dim,
-                                     features_loc_template)
+        traindata = cached_make_random_data(n_traindata,
+                                            class_list,
+                                            points_per_image,
+                                            feature_dim,
+                                            features_loc_template)
 
         self.assertEqual(traindata.samples_per_image, points_per_image)
         self.assertEqual(len(traindata), n_traindata)
@@ -48,116 +67,123 @@ class TestTrain(unittest.TestCase):
         points_per_image = 20
         feature_dim = 5
         class_list = [1, 2]
-        num_epochs = 4
-        feature_loc = DataLocation(storage_type='memory', key='')
+        # The test only checks that ref_acc has one entry per epoch, so
+        # two epochs prove the point as well as four at half the cost.
+        num_epochs = 2
+        feature_loc = FEATURES_LOC_TEMPLATE
 
-        labels = make_random_data(n_traindata,
-                                  class_list,
-                                  points_per_image,
-                                  feature_dim,
-                                  feature_loc)
+        labels = cached_make_random_data(n_traindata,
+                                         class_list,
+                                         points_per_image,
+                                         feature_dim,
+                                         feature_loc)
 
         for clf_type in config.CLASSIFIER_TYPES:
-            clf_calibrated, ref_acc = train(labels, feature_loc, num_epochs,
-                                            clf_type)
+            with self.subTest(clf_type=clf_type):
+                clf_calibrated, ref_acc = train(labels, feature_loc,
+                                                num_epochs, clf_type)
 
-            self.assertEqual(len(ref_acc), num_epochs)
+                self.assertEqual(len(ref_acc), num_epochs)
 
     def test_mlp_hybrid_mode(self):
 
         for (ntd, ppi, hls, lr) in [(11, 20, (100,), 1e-3),
                                     (1000, 100, (200, 100), 1e-4)]:
-            n_traindata = ntd
-            points_per_image = ppi
-            feature_dim = 5
-            class_list = [1, 2]
-            num_epochs = 4
-            feature_loc = DataLocation(storage_type='memory', key='')
-
-            labels = make_random_data(n_traindata,
-                                      class_list,
-                                      points_per_image,
-                                      feature_dim,
-                                      feature_loc)
-
-            clf_calibrated, ref_acc = train(labels, feature_loc, num_epochs,
-                                            'MLP')
-            clf_param = clf_calibrated.get_params()['base_estimator']
-            self.assertEqual(clf_param.hidden_layer_sizes, hls)
-            self.assertEqual(clf_param.learning_rate_init, lr)
+            # subTest reports which parameter row failed and keeps
+            # running the remaining rows.
+            with self.subTest(n_traindata=ntd, points_per_image=ppi):
+                feature_dim = 5
+                class_list = [1, 2]
+                # The hybrid-mode hyperparameters are picked from the
+                # dataset size before any training happens, so a single
+                # epoch is enough to inspect them.
+                num_epochs = 1
+                feature_loc = FEATURES_LOC_TEMPLATE
+
+                labels = cached_make_random_data(ntd,
+                                                 class_list,
+                                                 ppi,
+                                                 feature_dim,
+                                                 feature_loc)
+
+                clf_calibrated, ref_acc = train(labels, feature_loc,
+                                                num_epochs, 'MLP')
+                clf_param = clf_calibrated.get_params()['base_estimator']
+                self.assertEqual(clf_param.hidden_layer_sizes, hls)
+                self.assertEqual(clf_param.learning_rate_init, lr)
 
     def test_too_few_images(self):
-        n_traindata = config.MIN_TRAINIMAGES - 1
-        points_per_image = 20
-        feature_dim = 5
-        class_list = [1, 2]
         num_epochs = 4
-        feature_loc = DataLocation(storage_type='memory', key='')
+        feature_loc = FEATURES_LOC_TEMPLATE
 
-        labels = make_random_data(n_traindata,
-                                  class_list,
-                                  points_per_image,
-                                  feature_dim,
-                                  feature_loc)
+        # train() rejects the labels before touching any features, so
+        # hand-built labels suffice; no need to generate feature vectors.
+        labels = ImageLabels({
+            'img{}.features'.format(itt): [(0, 0, 1), (1, 1, 2)]
+            for itt in range(config.MIN_TRAINIMAGES - 1)
+        })
 
         for clf_type in config.CLASSIFIER_TYPES:
-            self.assertRaises(ValueError, train, labels, feature_loc,
-                              num_epochs, clf_type)
+            with self.subTest(clf_type=clf_type):
+                self.assertRaises(ValueError, train, labels, feature_loc,
+                                  num_epochs, clf_type)
 
     def test_too_few_classes(self):
         """ Can't train with only 1 class! """
-        n_traindata = config.MIN_TRAINIMAGES + 1
-        points_per_image = 20
-        feature_dim = 5
-        class_list = [1]
         num_epochs = 4
-        feature_loc = DataLocation(storage_type='memory', key='')
+        feature_loc = FEATURES_LOC_TEMPLATE
 
-        labels = make_random_data(n_traindata,
-                                  class_list,
-                                  points_per_image,
-                                  feature_dim,
-                                  feature_loc)
+        # The single-class check also fires before any features are
+        # loaded, so hand-built labels suffice here too.
+        labels = ImageLabels({
+            'img{}.features'.format(itt): [(0, 0, 1), (1, 1, 1)]
+            for itt in range(config.MIN_TRAINIMAGES + 1)
+        })
 
         for clf_type in config.CLASSIFIER_TYPES:
-            self.assertRaises(ValueError, train, labels, feature_loc,
-                              num_epochs, clf_type)
+            with self.subTest(clf_type=clf_type):
+                self.assertRaises(ValueError, train, labels, feature_loc,
+                                  num_epochs, clf_type)
 
 
 class TestEvaluateClassifier(unittest.TestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        # Both tests evaluate the same classifiers, so train one per
+        # type up front instead of once per test.
+        feature_loc = FEATURES_LOC_TEMPLATE
+        train_data = cached_make_random_data(10, [1, 2], 4, 5, feature_loc)
+        cls.clfs = {clf_type: train(train_data, feature_loc, 1, clf_type)[0]
+                    for clf_type in config.CLASSIFIER_TYPES}
+
     def test_simple(self):
-        feature_loc = DataLocation(storage_type='memory', key='')
-        train_data = make_random_data(10, [1, 2], 4, 5, feature_loc)
+        feature_loc = FEATURES_LOC_TEMPLATE
         for clf_type in config.CLASSIFIER_TYPES:
-            clf, _ = train(train_data, feature_loc, 1, clf_type)
-
-            val_data = make_random_data(3, [1, 2], 4, 5, feature_loc)
-            gts, ests, scores = evaluate_classifier(clf, val_data, [1, 2],
-                                                    feature_loc)
-            self.assertTrue(1 in gts)
-            self.assertTrue(2 in gts)
+            with self.subTest(clf_type=clf_type):
+                val_data = cached_make_random_data(3, [1, 2], 4, 5,
+                                                   feature_loc)
+                gts, ests, scores = evaluate_classifier(
+                    self.clfs[clf_type], val_data, [1, 2], feature_loc)
+                self.assertTrue(1 in gts)
+                self.assertTrue(2 in gts)
 
     def test_no_gt(self):
 
-        feature_loc = DataLocation(storage_type='memory', key='')
-        train_data = make_random_data(10, [1, 2], 4, 5, feature_loc)
+        feature_loc = FEATURES_LOC_TEMPLATE
         for clf_type in config.CLASSIFIER_TYPES:
-            clf, _ = train(train_data, feature_loc, 1, clf_type)
-
-            # Note here that class_list for the val_data doesn't include
-            # any samples from classes [1, 2] so the gt will be empty,
-            # which will raise an exception.
-            val_data = make_random_data(3, [3], 4, 5, feature_loc)
-            self.assertRaises(ValueError, evaluate_classifier,
-                              clf, val_data, [1, 2], feature_loc)
+            with self.subTest(clf_type=clf_type):
+                # Note here that class_list for the val_data doesn't include
+                # any samples from classes [1, 2] so the gt will be empty,
+                # which will raise an exception.
+                val_data = cached_make_random_data(3, [3], 4, 5, feature_loc)
+                self.assertRaises(ValueError, evaluate_classifier,
+                                  self.clfs[clf_type], val_data, [1, 2],
+                                  feature_loc)
 
 
 class TestCalcBatchSize(unittest.TestCase):
 
-    def setUp(self):
-        config.filter_warnings()
-
     def test1(self):
 
         images_per_batch, batches_per_epoch = calc_batch_size(1000, 10)
@@ -209,8 +235,6 @@ class TestAcc(unittest.TestCase):
 class TestLoadImageData(unittest.TestCase):
 
     def setUp(self):
-
-        config.filter_warnings()
         self.feat_key = 'tmp_features'
         self.feature_loc = DataLocation(storage_type='memory',
                                         key=self.feat_key)
@@ -218,14 +242,13 @@ class TestLoadImageData(unittest.TestCase):
     def fixtures(self, in_order=True, valid_rowcol=True) \
             -> Tuple[ImageLabels, ImageFeatures]:
 
-        labels = ImageLabels(
-            data={self.feat_key: [(100, 100, 1),
-                                  (200, 200, 2),
-                                  (300, 300, 1)]})
+        labels = LOAD_DATA_LABELS
 
-        fv1 = [1.1, 1.2, 1.3]
-        fv2 = [2.1, 2.2, 2.3]
-        fv3 = [3.1, 3.2, 3.3]
+        # float32 matches what PointFeatures holds internally, so no
+        # dtype conversion happens when building the fixtures.
+        fv1 = np.array([1.1, 1.2, 1.3], dtype=np.float32)
+        fv2 = np.array([2.1, 2.2, 2.3], dtype=np.float32)
+        fv3 = np.array([3.1, 3.2, 3.3], dtype=np.float32)
         if in_order:
             pfs = [
                 PointFeatures(100, 100, fv1),
@@ -295,8 +318,10 @@ class TestLoadImageData(unittest.TestCase):
         x, y = load_image_data(labels, self.feat_key, [1], self.feature_loc)
 
         self.assertEqual(y, [1, 1])
-        self.assertTrue(np.array_equal(x[0], features.point_features[0].data))
-        self.assertTrue(np.array_equal(x[1], features.point_features[2].data))
+        # One comparison over the whole result instead of one per row.
+        self.assertTrue(np.array_equal(
+            x, [features.point_features[0].data,
+                features.point_features[2].data]))
 
     def test_other_small_labelset(self):
         """ Here we use a smaller labelset and assert
@@ -309,6 +334,17 @@ class TestLoadImageData(unittest.TestCase):
         self.assertEqual(y, [2])
         self.assertTrue(np.array_equal(x[0], features.point_features[1].data))
 
+    def test_does_not_mutate_labels(self):
+        """ The module-level labels are shared between tests, which is
+        only safe as long as load_image_data treats them as read-only.
+        """
+        labels, _ = self.fixtures(in_order=True)
+        snapshot = repr(labels)
+
+        load_image_data(labels, self.feat_key, [1, 2], self.feature_loc)
+
+        self.assertEqual(repr(labels), snapshot)
+
     def test_legacy_smaller_labelset(self):
         """
         Here we pretend the features are legacy such that row, col
@@ -321,22 +357,21 @@ class TestLoadImageData(unittest.TestCase):
         self.assertEqual(y, [1, 1])
         # Since the order is reversed, the first feature should be the second
         # vector of point_features list. But it is not.
-        self.assertTrue(np.array_equal(x[0], features.point_features[0].data))
-        self.assertTrue(np.array_equal(x[1], features.point_features[2].data))
+        self.assertTrue(np.array_equal(
+            x, [features.point_features[0].data,
+                features.point_features[2].data]))
 
 
 class TestLoadBatchData(unittest.TestCase):
 
     def setUp(self):
-        
-        config.filter_warnings()
         self.feat_key1 = 'tmp_features1'
         self.feat_key2 = 'tmp_features2'
         self.feat1_loc = DataLocation(storage_type='memory',
                                       key='tmp_features1')
         self.feat2_loc = DataLocation(storage_type='memory',
                                       key='tmp_features2')
-        self.feat_loc_template = DataLocation(storage_type='memory', key='')
+        self.feat_loc_template = FEATURES_LOC_TEMPLATE
 
     def fixtures(self, valid_rowcol=True) \
             -> Tuple[ImageLabels, ImageFeatures, ImageFeatures]:
@@ -351,9 +386,12 @@ class TestLoadBatchData(unittest.TestCase):
 
         features1 = ImageFeatures(
             point_features=[
-                PointFeatures(100, 100, [1.1, 1.2, 1.3]),
-                PointFeatures(200, 200, [2.1, 2.2, 2.3]),
-                PointFeatures(300, 300, [3.1, 3.2, 3.3]),
+                PointFeatures(100, 100,
+                              np.array([1.1, 1.2, 1.3], dtype=np.float32)),
+                PointFeatures(200, 200,
+                              np.array([2.1, 2.2, 2.3], dtype=np.float32)),
+                PointFeatures(300, 300,
+                              np.array([3.1, 3.2, 3.3], dtype=np.float32)),
             ],
             valid_rowcol=valid_rowcol,
             feature_dim=3,
@@ -363,9 +401,12 @@ class TestLoadBatchData(unittest.TestCase):
 
         features2 = ImageFeatures(
             point_features=[
-                PointFeatures(10, 10, [10.1, 10.2, 10.3]),
-                PointFeatures(20, 20, [20.1, 20.2, 20.3]),
-                PointFeatures(30, 30, [30.1, 30.2, 30.3]),
+                PointFeatures(10, 10,
+                              np.array([10.1, 10.2, 10.3], dtype=np.float32)),
+                PointFeatures(20, 20,
+                              np.array([20.1, 20.2, 20.3], dtype=np.float32)),
+                PointFeatures(30, 30,
+                              np.array([30.1, 30.2, 30.3], dtype=np.float32)),
             ],
             valid_rowcol=valid_rowcol,
             feature_dim=3,
@@ -381,16 +422,18 @@ class TestLoadBatchData(unittest.TestCase):
         x, y = load_batch_data(labels, [self.feat_key1, self.feat_key2],
                                [1, 2], self.feat_loc_template)
 
-        self.assertTrue(np.array_equal(x[0], features1.point_features[0].data))
-        self.assertTrue(np.array_equal(x[3], features2.point_features[0].data))
+        self.assertTrue(np.array_equal(
+            [x[0], x[3]], [features1.point_features[0].data,
+                           features2.point_features[0].data]))
 
     def test_reverse_imkey_order(self):
         labels, features1, features2 = self.fixtures(valid_rowcol=True)
         x, y = load_batch_data(labels, [self.feat_key2, self.feat_key1],
                                [1, 2], self.feat_loc_template)
 
-        self.assertTrue(np.array_equal(x[0], features2.point_features[0].data))
-        self.assertTrue(np.array_equal(x[3], features1.point_features[0].data))
+        self.assertTrue(np.array_equal(
+            [x[0], x[3]], [features2.point_features[0].data,
+                           features1.point_features[0].data]))
 
     def test_one_label(self):
 
@@ -399,7 +442,7 @@ class TestLoadBatchData(unittest.TestCase):
                                [1], self.feat_loc_template)
 
         # Both images have two points with label=1
-        self.assertEqual(len(x), 4)
+        self.assertEqual(x.shape, (4, 3))
         self.assertEqual(len(y), 4)
 
 
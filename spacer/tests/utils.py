@@ -0,0 +1,98 @@
+"""
+Shared helpers for the test suite.
+"""
+
+import copy
+import random
+import struct
+import zlib
+from io import BytesIO
+from typing import List, Tuple
+
+import numpy as np
+
+from spacer.data_classes import ImageLabels
+from spacer.messages import DataLocation
+from spacer.storage import storage_factory
+from spacer.tests._datagen_cache import load_or_build
+from spacer.train_utils import make_random_data
+
+def store_fake_image(loc: DataLocation, size: Tuple[int, int]) -> None:
+    """ Stores a header-only PNG declaring the given (width, height).
+
+    PIL reads the size lazily from the header, so tests that only
+    exercise size checks can use arbitrarily large dimensions without
+    allocating (or encoding) any pixel data.
+    """
+    width, height = size
+
+    def chunk(chunk_type, payload):
+        return struct.pack('>I', len(payload)) + chunk_type + payload + \
+            struct.pack('>I', zlib.crc32(chunk_type + payload))
+
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    blob = b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', ihdr) + \
+        chunk(b'IDAT', zlib.compress(b'')) + chunk(b'IEND', b'')
+
+    storage = storage_factory(loc.storage_type, loc.bucket_name)
+    storage.store(loc.key, BytesIO(blob))
+
+
+# Generating random training data dominates the runtime of several test
+# modules, and many tests ask for the exact same shape. Memoize the
+# generated labels per parameter tuple and hand out copies, so tests
+# that mutate their labels stay isolated.
+_random_data_cache = {}
+
+
+def cached_make_random_data(im_count: int,
+                            class_list: List[int],
+                            points_per_image: int,
+                            feature_dim: int,
+                            feature_loc: DataLocation) -> ImageLabels:
+    """ Memoizing wrapper around train_utils.make_random_data. """
+    key = (im_count, tuple(class_list), points_per_image, feature_dim,
+           feature_loc.storage_type, feature_loc.bucket_name)
+
+    storage = storage_factory(feature_loc.storage_type,
+                              feature_loc.bucket_name)
+
+    labels = _random_data_cache.get(key)
+    if labels is not None:
+        # Only reuse the cached labels if the stored features they point
+        # to are still around (storage may have been cleared since).
+        if all(storage.exists(imkey) for imkey in labels.image_keys):
+            return copy.deepcopy(labels)
+
+    seed = zlib.crc32(repr(key).encode('utf-8'))
+
+    def _build():
+        # Seed generation off the parameter key so the cached values are
+        # deterministic from run to run. make_random_data draws from the
+        # process-global generators, so save and restore their state;
+        # otherwise a cache miss would perturb the RNG stream seen by
+        # whatever test runs next.
+        random_state = random.getstate()
+        np_random_state = np.random.get_state()
+        try:
+            random.seed(seed)
+            np.random.seed(seed)
+            built = make_random_data(im_count, class_list, points_per_image,
+                                     feature_dim, feature_loc)
+        finally:
+            random.setstate(random_state)
+            np.random.set_state(np_random_state)
+        blobs = {imkey: storage.load(imkey).getvalue()
+                 for imkey in built.image_keys}
+        return built, blobs
+
+    # The labels are pickled to disk together with the stored feature
+    # blobs they refer to, so warm runs skip generation entirely.
+    labels, blobs = load_or_build(
+        'random_data_v3_{:08x}'.format(seed), _build)
+    for imkey, blob in blobs.items():
+        if not storage.exists(imkey):
+            storage.store(imkey, BytesIO(blob))
+
+    _random_data_cache[key] = labels
+    return copy.deepcopy(labels)
@@ -11,7 +11,7 @@ from sklearn.calibration import CalibratedClassifierCV
 from spacer import config
 from spacer.data_classes import ImageLabels, ValResults
 from spacer.messages import TrainClassifierReturnMsg, DataLocation
-from spacer.train_utils import train, evaluate_classifier, calc_acc
+from spacer.train_utils import train, evaluate_classifiers, calc_acc
 
 
 class ClassifierTrainer(abc.ABC):  # pragma: no cover
@@ -50,16 +50,13 @@ class MiniBatchTrainer(ClassifierTrainer):
         clf, ref_accs = train(train_labels, feature_loc, nbr_epochs, clf_type)
         classes = clf.classes_.tolist()
 
-        # Evaluate new classifier on validation set.
-        val_gts, val_ests, val_scores = evaluate_classifier(
-            clf, val_labels, classes, feature_loc)
-
-        # Evaluate previous classifiers on validation set.
-        pc_accs = []
-        for pc_model in pc_models:
-            pc_gts, pc_ests, _ = evaluate_classifier(pc_model, val_labels,
-                                                     classes, feature_loc)
-            pc_accs.append(calc_acc(pc_gts, pc_ests))
+        # Evaluate new and previous classifiers on the validation set
+        # in one pass, so each image's features are only loaded once.
+        results = evaluate_classifiers([clf] + pc_models, val_labels,
+                                       classes, feature_loc)
+        val_gts, val_ests, val_scores = results[0]
+        pc_accs = [calc_acc(pc_gts, pc_ests)
+                   for pc_gts, pc_ests, _ in results[1:]]
 
         return \
             clf, \
@@ -13,7 +13,7 @@ from sklearn.linear_model import SGDClassifier
 from sklearn.neural_network import MLPClassifier
 
 from spacer import config
-from spacer.data_classes import ImageLabels, ImageFeatures
+from spacer.data_classes import ImageLabels, ImageFeatures, PointFeatures
 from spacer.messages import DataLocation
 
 
@@ -88,23 +88,35 @@ def train(labels: ImageLabels,
     return clf_calibrated, ref_acc
 
 
-def evaluate_classifier(clf: CalibratedClassifierCV,
-                        labels: ImageLabels,
-                        classes: List[int],
-                        feature_loc: DataLocation) -> Tuple[List, List, List]:
-    """ Evaluates classifier on data """
-    scores, gts, ests = [], [], []
+def evaluate_classifiers(clfs: List[CalibratedClassifierCV],
+                         labels: ImageLabels,
+                         classes: List[int],
+                         feature_loc: DataLocation) \
+        -> List[Tuple[List, List, List]]:
+    """ Evaluates several classifiers on the same data. Each image's
+    features are loaded once and scored by every classifier, rather
+    than re-loaded per classifier. """
+    results = [([], [], []) for _ in clfs]
     for imkey in labels.image_keys:
         x, y = load_image_data(labels, imkey, classes, feature_loc)
         if len(x) > 0:
-            scores.extend(clf.predict_proba(x).max(axis=1).tolist())
-            ests.extend(clf.predict(x))
-            gts.extend(y)
+            for clf, (gts, ests, scores) in zip(clfs, results):
+                scores.extend(clf.predict_proba(x).max(axis=1).tolist())
+                ests.extend(clf.predict(x))
+                gts.extend(y)
 
-    if len(gts) == 0:
+    if len(results[0][0]) == 0:
         raise ValueError('Not enough data in validation set.')
 
-    return gts, ests, scores
+    return results
+
+
+def evaluate_classifier(clf: CalibratedClassifierCV,
+                        labels: ImageLabels,
+                        classes: List[int],
+                        feature_loc: DataLocation) -> Tuple[List, List, List]:
+    """ Evaluates classifier on data """
+    return evaluate_classifiers([clf], labels, classes, feature_loc)[0]
 
 
 def chunkify(lst: List,
@@ -123,7 +135,7 @@ def load_image_data(labels: ImageLabels,
                     imkey: str,
                     classes: List[int],
                     feature_loc: DataLocation) \
-        -> Tuple[List[List[float]], List[int]]:
+        -> Tuple[np.ndarray, List[int]]:
     """
     Loads features and labels for image and matches feature with labels.
     """
@@ -138,9 +150,9 @@ def load_image_data(labels: ImageLabels,
     # Sanity check
     if image_features.valid_rowcol:
         # With new data structure just check that the sets of row, col
-        # given by the labels is available in the features.
-        rc_features_set = set([(pf.row, pf.col) for pf in
-                               image_features.point_features])
+        # given by the labels is available in the features. The (row, col)
+        # index built when the features were loaded doubles as that set.
+        rc_features_set = image_features.rowcol_index.keys()
         rc_labels_set = set([(row, col) for (row, col, _) in image_labels])
         assert rc_labels_set.issubset(rc_features_set)
     else:
@@ -148,61 +160,73 @@ def load_image_data(labels: ImageLabels,
         assert len(image_labels) == len(image_features.point_features), \
             "number of extracted features doesn't match the number of labels!"
 
-    x, y = [], []
+    # Membership checks against a set are O(1); the classes list can be
+    # long for large labelsets.
+    classes_set = set(classes)
+
+    x_idx, y = [], []
     if image_features.valid_rowcol:
+        rowcol_index = image_features.rowcol_index
         for row, col, label in image_labels:
-            if label not in classes:
+            if label not in classes_set:
                 # Remove samples for which the label is not in classes.
                 continue
-            x.append(image_features[(row, col)])
+            x_idx.append(rowcol_index[(row, col)])
             y.append(label)
 
     else:
         # For legacy features, we didn't store the row, col information.
         # Instead rely on ordering.
-        for (_, _, label), point_feature in zip(image_labels,
-                                                image_features.point_features):
-            if label not in classes:
+        for enum, (_, _, label) in enumerate(image_labels):
+            if label not in classes_set:
                 continue
-            x.append(point_feature.data)
+            x_idx.append(enum)
             y.append(label)
 
-    return x, y
+    # Gather all kept feature rows in one indexed read from the matrix
+    # instead of appending one vector at a time.
+    return image_features.data_matrix[x_idx], y
 
 
 def load_batch_data(labels: ImageLabels,
                     imkeylist: List[str],
                     classes: List[int],
                     feature_loc: DataLocation) \
-        -> Tuple[List[List[float]], List[int]]:
+        -> Tuple[np.ndarray, np.ndarray]:
     """ Loads features and labels and match them together. """
+    # Collect the per-image matrices and concatenate once at the end;
+    # extending a flat list row by row would re-introduce a Python-level
+    # loop over every feature vector.
     x, y = [], []
     for imkey in imkeylist:
         x_, y_ = load_image_data(labels, imkey, classes, feature_loc)
-        x.extend(x_)
+        x.append(x_)
         y.extend(y_)
-    return x, y
+    return np.concatenate(x), np.asarray(y)
 
 
 def calc_acc(gt: List[int], est: List[int]) -> float:
     """
     Calculate the accuracy of (agreement between) two integer valued list.
     """
+    gt = np.asarray(gt)
+    est = np.asarray(est)
+
     if len(gt) == 0 or len(est) == 0:
         raise TypeError('Inputs can not be empty')
 
     if not len(gt) == len(est):
         raise ValueError('Input gt and est must have the same length')
 
-    for g in gt:
-        if not int(g) == g:
-            raise TypeError('Input gt must be an array of ints')
+    # The integrality checks and the agreement count all run as single
+    # array operations instead of per-element Python loops.
+    if not np.issubdtype(gt.dtype, np.integer) and np.any(np.mod(gt, 1)):
+        raise TypeError('Input gt must be an array of ints')
 
-    for e in est:
-        if not int(e) == e:
-            raise TypeError('Input est must be an array of ints')
+    if not np.issubdtype(est.dtype, np.integer) and np.any(np.mod(est, 1)):
+        raise TypeError('Input est must be an array of ints')
 
-    return float(sum([(g == e) for (g, e) in zip(gt, est)])) / len(gt)
+    return float(np.mean(gt == est))
 
 
 def make_random_data(im_count: int,
@@ -214,15 +238,27 @@ def make_random_data(im_count: int,
     Utility method for testing that generates an ImageLabels instance
     complete with stored ImageFeatures.
     """
-    labels = ImageLabels(data={})
-    for _ in range(im_count):
+    # Draw all labels and features for all images in two bulk calls
+    # (using labels to draw features from a Gaussian), instead of one
+    # RNG call per image.
+    all_labels = np.random.choice(class_list,
+                                  size=(im_count, points_per_image))
 
-        # Generate random features (using labels to draw from a Gaussian).
-        point_labels = np.random.choice(class_list, points_per_image).tolist()
+    # Make sure all classes are present in every image.
+    all_labels[:, :len(class_list)] = class_list
+    all_feats = (np.random.randn(im_count, points_per_image, feature_dim) +
+                 all_labels[:, :, np.newaxis]).astype(np.float32)
 
-        # Make sure all classes are present
-        point_labels[:len(class_list)] = class_list
-        feats = ImageFeatures.make_random(point_labels, feature_dim)
+    labels = ImageLabels(data={})
+    for itt in range(im_count):
+        point_labels = all_labels[itt].tolist()
+        feats = ImageFeatures(
+            point_features=[PointFeatures(row=pnt, col=pnt,
+                                          data=all_feats[itt, pnt])
+                            for pnt in range(points_per_image)],
+            valid_rowcol=True,
+            feature_dim=feature_dim,
+            npoints=points_per_image)
 
         # Generate a random string as imkey.
         imkey = ''.join(random.choice(string.ascii_uppercase + string.digits)